@@ -1,9 +1,18 @@
+from glob import glob
 from os import chdir, getcwd, mkdir, listdir, environ
 from os.path import isdir
+from shutil import which
+from subprocess import run
 
+from matplotlib import use
 from pytest import fixture
 
 
+def pytest_configure(config):
+    """Use the non-interactive backend: the figures are only saved to files"""
+    use("Agg")
+
+
 def pytest_sessionstart(session):
     """
     Called after the Session object has been created and
@@ -23,8 +32,27 @@ def pytest_sessionstart(session):
         mkdir("output")
 
 
+def pytest_sessionfinish(session, exitstatus):
+    """
+    Called after whole test run finished, right before returning the exit status to the system.
+
+    The graphs are saved by the tests as `.dot` sources, render them all to `.svg` with a single
+    call of `dot`, if it is available
+    """
+    if not session.config.option.save_graphs or not (dot := which("dot")):
+        return
+    if dotfiles := sorted(glob("output/*.dot")):
+        run([dot, "-Tsvg", "-O", *dotfiles], check=False)
+
+
 def pytest_addoption(parser):
     parser.addoption("--debug-graph", action="store_true", default=False)
+    parser.addoption(
+        "--save-graphs", action="store_true", default=False, help="save the graphs of the tests"
+    )
+    parser.addoption(
+        "--plots", action="store_true", default=False, help="save the plots of the tests"
+    )
 
 
 @fixture(scope="session")
@@ -32,6 +60,16 @@ def debug_graph(request):
     return request.config.option.debug_graph
 
 
+@fixture(scope="session")
+def save_graphs(request):
+    return request.config.option.save_graphs
+
+
+@fixture(scope="session")
+def plots(request):
+    return request.config.option.plots
+
+
 @fixture()
 def testname():
     """Returns corrected full name of a test"""
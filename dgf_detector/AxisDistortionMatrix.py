@@ -2,8 +2,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-from numpy import allclose
-from numba import njit
+from numpy import empty
+from scipy.sparse import csr_matrix
 
 from dagflow.core.node import Node
 from dagflow.core.type_functions import (
@@ -15,9 +15,16 @@ from dagflow.core.type_functions import (
     evaluate_dtype_of_outputs,
 )
 
-if TYPE_CHECKING:
-    from collections.abc import Callable
+from dgf_detector._kernels.axisdistortion import (
+    _axisdistortion_numba,
+    _axisdistortion_python,
+    _clear_matrix_numba,
+    _clear_matrix_python,
+    _fill_matrix_numba,
+    _fill_matrix_python,
+)
 
+if TYPE_CHECKING:
     from numpy.typing import NDArray
 
     from dagflow.core.input import Input
@@ -34,6 +41,10 @@ class AxisDistortionMatrix(Node):
         "_edges_modified",
         "_edges_backward",
         "_result",
+        "_rows",
+        "_columns",
+        "_values",
+        "_nnz",
     )
 
     _edges_original: Input
@@ -41,6 +52,10 @@ class AxisDistortionMatrix(Node):
     _edges_modified: Input
     _edges_backward: Input
     _result: Output
+    _rows: NDArray
+    _columns: NDArray
+    _values: NDArray
+    _nnz: int
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -64,23 +79,50 @@ class AxisDistortionMatrix(Node):
             }
         )
 
+    @property
+    def nnz(self) -> int:
+        return self._nnz
+
+    def to_csr(self) -> csr_matrix:
+        """Return the matrix in the CSR format, built from the nonzero elements
+
+        Triggers the evaluation of the node if needed. The result does not share the memory
+        with the node and is not updated on the following evaluations.
+        """
+        self._result.data  # evaluate the node if tainted
+        nnz = self._nnz
+        return csr_matrix(
+            (self._values[:nnz], (self._rows[:nnz], self._columns[:nnz])),
+            shape=self._result.dd.shape,
+        )
+
     def _function_python(self):
-        _axisdistortion_python(
+        matrix, rows, columns, values = self._result._data, self._rows, self._columns, self._values
+        _clear_matrix_python(matrix, rows, columns, self._nnz)
+        self._nnz = nnz = _axisdistortion_python(
             self._edges_original.data,
             self._edges_target.data,
             self._edges_modified.data,
             self._edges_backward.data,
-            self._result._data,
+            rows,
+            columns,
+            values,
         )
+        _fill_matrix_python(matrix, rows, columns, values, nnz)
 
     def _function_numba(self):
-        _axisdistortion_numba(
+        matrix, rows, columns, values = self._result._data, self._rows, self._columns, self._values
+        _clear_matrix_numba(matrix, rows, columns, self._nnz)
+        self._nnz = nnz = _axisdistortion_numba(
             self._edges_original.data,
             self._edges_target.data,
             self._edges_modified.data,
             self._edges_backward.data,
-            self._result._data,
+            rows,
+            columns,
+            values,
         )
+        _fill_matrix_numba(matrix, rows, columns, values, nnz)
 
     def _type_function(self) -> None:
         """A output takes this function to determine the dtype and shape."""
@@ -101,94 +143,14 @@ class AxisDistortionMatrix(Node):
         edges_original = self._edges_original.parent_output
         edges_target = self._edges_target.parent_output
         self._result.dd.axes_edges = (edges_target, edges_original)
-        self.function = self._functions_dict["numba"]
 
+        # each step of the walker advances either over the original or over the backward
+        # projected edges, therefore there may be at most 2*nbins nonzero elements
+        nnz_max = 2 * (nedges - 1)
+        self._rows = empty(nnz_max, dtype="l")
+        self._columns = empty(nnz_max, dtype="l")
+        self._values = empty(nnz_max, dtype=self._result.dd.dtype)
+        # the content of the matrix is unknown: it will be cleared fully on the first call
+        self._nnz = -1
 
-def _axisdistortion_python(
-    edges_original: NDArray,
-    edges_target: NDArray,
-    edges_modified: NDArray,
-    edges_backwards: NDArray,
-    matrix: NDArray,
-) -> None:
-    # in general, target edges may be different (finer than original), the code should be able to handle it.
-    # but currently we just check that edges are the same.
-    assert edges_original is edges_target or allclose(edges_original, edges_target, atol=0.0, rtol=0.0)
-
-    edges_target = edges_original
-    min_original = edges_original[0]
-    min_target = edges_target[0]
-    nbinsx = edges_original.size - 1
-    nbinsy = edges_target.size - 1
-
-    matrix[:, :] = 0.0
-
-    threshold = -1e10
-    # left_axis = 0
-    right_axis = 0
-    idxx0, idxx1, idxy = -1, -1, 0
-    leftx_fine, lefty_fine = threshold, threshold
-    while (
-        leftx_fine <= threshold or leftx_fine < min_original or lefty_fine < min_target
-    ):
-        left_edge_from_x = edges_original[idxx0 + 1] < edges_backwards[idxx1 + 1]
-        if left_edge_from_x:
-            leftx_fine, lefty_fine = (
-                edges_original[idxx0 + 1],
-                edges_modified[idxx0 + 1],
-            )
-            # left_axis = 0
-            if (idxx0 := idxx0 + 1) >= nbinsx:
-                return
-        else:
-            leftx_fine, lefty_fine = edges_backwards[idxx1 + 1], edges_target[idxx1 + 1]
-            # left_axis = 1
-            if (idxx1 := idxx1 + 1) >= nbinsx:
-                return
-
-    width_coarse = edges_original[idxx0 + 1] - edges_original[idxx0]
-    while True:
-        right_orig = edges_original[idxx0 + 1]
-        right_backwards = edges_backwards[idxx1 + 1]
-
-        if right_orig < right_backwards:
-            rightx_fine = right_orig
-            righty_fine = edges_modified[idxx0 + 1]
-            right_axis = 0
-        else:
-            rightx_fine = right_backwards
-            righty_fine = edges_target[idxx1 + 1]
-            right_axis = 1
-
-        while lefty_fine >= edges_target[idxy + 1]:
-            if (idxy := idxy + 1) > nbinsy:
-                break
-
-        ##
-        ## Uncomment the following lines to see the debug output
-        ## (you need to also uncomment all the `left_axis` lines)
-        ##
-        # width_fine = rightx_fine-leftx_fine
-        # factor = width_fine/width_coarse
-        # print(
-        #         f"x:{leftx_fine:8.4f}→{rightx_fine:8.4f}="
-        #         f"{width_fine:8.4f}/{width_coarse:8.4f}={factor:8.4g} "
-        #         f"ax:{left_axis}→{right_axis} idxx:{idxx0: 4d},{idxx1: 4d} idxy: {idxy: 4d} "
-        #         f"y:{lefty_fine:8.4f}→{righty_fine:8.4f}"
-        # )
-
-        matrix[idxy, idxx0] = (rightx_fine - leftx_fine) / width_coarse
-
-        if right_axis == 0:
-            if (idxx0 := idxx0 + 1) >= nbinsx:
-                break
-            width_coarse = edges_original[idxx0 + 1] - edges_original[idxx0]
-        elif (idxx1 := idxx1 + 1) >= nbinsx:
-            break
-        leftx_fine, lefty_fine = rightx_fine, righty_fine
-        # left_axis = right_axis
-
-
-_axisdistortion_numba: Callable[[NDArray, NDArray, NDArray, NDArray, NDArray], None] = (
-    njit(cache=True)(_axisdistortion_python)
-)
+        self.function = self._functions_dict["numba"]
@@ -116,7 +116,7 @@ def _axisdistortion_linear_python(
 
     min_target = max(min_value_modified, min_target)
 
-    matrix[:, :] = 0.0
+    matrix.fill(0.0)
 
     threshold = -1e10
     # left_axis = 0
@@ -153,9 +153,12 @@ def _axisdistortion_linear_python(
             # rightx_fine = -1
             right_axis = 1
 
-        while lefty_fine >= edges_target[idxy + 1]:
-            if (idxy := idxy + 1) > nbinsy:
-                break
+        while idxy < nbinsy and lefty_fine >= edges_target[idxy + 1]:
+            idxy += 1
+        if idxy >= nbinsy:
+            # the left edge reached the end of the target axis before the walk is finished, which
+            # happens when a modified edge matches the last target edge: the rest is out of range
+            break
 
         #
         # Uncomment the following lines to see the debug output
@@ -8,6 +8,7 @@ from dagflow.core.storage import NodeStorage
 from dagflow.lib.linalg import VectorMatrixProduct
 
 from dgf_detector.RebinMatrix import RebinMatrix
+from dgf_detector.RebinSum import RebinSum
 
 if TYPE_CHECKING:
     from collections.abc import Mapping
@@ -19,31 +20,43 @@ if TYPE_CHECKING:
 
 
 class Rebin(MetaNode):
-    __slots__ = ("_RebinMatrixList", "_VectorMatrixProductList")
+    """Rebin histograms.
+
+    With `sparse=True` the histograms are rebinned by RebinSum, which sums the old bins
+    within each new bin, instead of the product with the rebin matrix.
+    """
+
+    __slots__ = ("_RebinMatrixList", "_VectorMatrixProductList", "_RebinSumList")
 
     _RebinMatrixList: list[Node]
     _VectorMatrixProductList: list[Node]
+    _RebinSumList: list[Node]
 
     def __init__(
         self,
         *,
         bare: bool = False,
         mode: RebinModesType = "numba",
+        sparse: bool = False,
         labels: Mapping = {},
         **kwargs,
     ):
         super().__init__()
         self._RebinMatrixList = []
         self._VectorMatrixProductList = []
+        self._RebinSumList = []
         if bare:
             return
 
         self.add_RebinMatrix(
             name="RebinMatrix", mode=mode, label=labels.get("RebinMatrix", {}), **kwargs
         )
-        self.add_VectorMatrixProduct(
-            "VectorMatrixProduct", labels.get("VectorMatrixProduct", {})
-        )
+        if sparse:
+            self.add_RebinSum("RebinSum", labels.get("RebinSum", {}))
+        else:
+            self.add_VectorMatrixProduct(
+                "VectorMatrixProduct", labels.get("VectorMatrixProduct", {})
+            )
         self._bind_outputs()
 
     def add_RebinMatrix(
@@ -75,19 +88,35 @@ class Rebin(MetaNode):
         self._leading_node = _VectorMatrixProduct
         return _VectorMatrixProduct
 
+    def add_RebinSum(self, name: str = "RebinSum", label: Mapping = {}) -> RebinSum:
+        _RebinSum = RebinSum(name, label=label)
+        self._RebinSumList.append(_RebinSum)
+        self._add_node(
+            _RebinSum,
+            inputs_pos=True,
+            outputs_pos=True,
+            missing_inputs=True,
+            also_missing_outputs=True,
+        )
+        self._leading_node = _RebinSum
+        return _RebinSum
+
     def _bind_outputs(self) -> None:
-        if (l1 := len(self._VectorMatrixProductList)) != (
-            l2 := len(self._RebinMatrixList)
-        ):
+        if (
+            l1 := len(self._VectorMatrixProductList) + len(self._RebinSumList)
+        ) != (l2 := len(self._RebinMatrixList)):
             raise ConnectionError(
-                "Cannot bind outputs! Nodes must be pairs of (VectorMatrixProduct, RebinMatrix), "
-                f"but current lengths are {l1}, {l2}!",
+                "Cannot bind outputs! Nodes must be pairs of (VectorMatrixProduct or RebinSum, "
+                f"RebinMatrix), but current lengths are {l1}, {l2}!",
                 node=self,
             )
         for _VectorMatrixProduct, _RebinMatrix in zip(
             self._VectorMatrixProductList, self._RebinMatrixList
         ):
             _RebinMatrix.outputs["matrix"] >> _VectorMatrixProduct.inputs["matrix"]
+        for _RebinSum, _RebinMatrix in zip(self._RebinSumList, self._RebinMatrixList):
+            _RebinMatrix.outputs["indices"] >> _RebinSum.inputs["indices"]
+            _RebinMatrix.outputs["matrix"] >> _RebinSum.inputs["matrix"]
 
     @classmethod
     def replicate(
@@ -96,10 +125,12 @@ class Rebin(MetaNode):
         names: Mapping[str, str] = {
             "matrix": "rebin_matrix",
             "product": "vector_matrix_product",
+            "sum": "rebin_sum",
         },
         path: str | None = None,
         labels: Mapping = {},
         replicate_outputs: tuple[KeyLike, ...] = ((),),
+        sparse: bool = False,
         verbose: bool = False,
         **kwargs,
     ) -> tuple[Rebin, NodeStorage]:
@@ -109,11 +140,14 @@ class Rebin(MetaNode):
         outputs = storage("outputs")
 
         instance = cls(bare=True)
-        key_VectorMatrixProduct = tuple(names.get("product", "product").split("."))
+        if sparse:
+            key_product = tuple(names.get("sum", "sum").split("."))
+        else:
+            key_product = tuple(names.get("product", "product").split("."))
         key_RebinMatrix = tuple(names.get("matrix", "matrix").split("."))
         if path:
             tpath = tuple(path.split("."))
-            key_VectorMatrixProduct = tpath + key_VectorMatrixProduct
+            key_product = tpath + key_product
             key_RebinMatrix = tpath + key_RebinMatrix
 
         _RebinMatrix = instance.add_RebinMatrix(
@@ -129,13 +163,18 @@ class Rebin(MetaNode):
             if isinstance(key, str):
                 key = (key,)
 
-            name = ".".join(key_VectorMatrixProduct + key)
-            _VectorMatrixProduct = instance.add_VectorMatrixProduct(name, label_int)
-            _VectorMatrixProduct()
-            nodes[name] = _VectorMatrixProduct
-            inputs[name] = _VectorMatrixProduct.inputs["vector"]
-            outputs[name] = _VectorMatrixProduct.outputs["result"]
-            _RebinMatrix.outputs["matrix"] >> _VectorMatrixProduct.inputs["matrix"]
+            name = ".".join(key_product + key)
+            if sparse:
+                _product = instance.add_RebinSum(name, label_int)
+            else:
+                _product = instance.add_VectorMatrixProduct(name, label_int)
+            _product()
+            nodes[name] = _product
+            inputs[name] = _product.inputs["vector"]
+            outputs[name] = _product.outputs["result"]
+            if sparse:
+                _RebinMatrix.outputs["indices"] >> _product.inputs["indices"]
+            _RebinMatrix.outputs["matrix"] >> _product.inputs["matrix"]
 
         NodeStorage.update_current(storage, strict=True, verbose=verbose)
         return instance, storage
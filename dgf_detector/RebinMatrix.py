@@ -12,15 +12,13 @@ from dagflow.core.type_functions import (
     check_dimension_of_inputs,
     check_inputs_equivalence,
 )
-from numba import njit
-from numpy import allclose, finfo, isclose
+from numpy import allclose, finfo
 
-if TYPE_CHECKING:
-    from collections.abc import Callable
+from dgf_detector._kernels.rebin import _calc_rebin_matrix_numba, _calc_rebin_matrix_python
 
+if TYPE_CHECKING:
     from dagflow.core.input import Input
     from dagflow.core.output import Output
-    from numpy.typing import NDArray
 
 
 RebinModes = {"python", "numba"}
@@ -28,13 +26,20 @@ RebinModesType = Literal[RebinModes]
 
 
 class RebinMatrix(Node):
-    """For a given `edges_old` and `edges_new` computes the conversion matrix"""
+    """For a given `edges_old` and `edges_new` computes the conversion matrix
+
+    outputs:
+        `0` or `matrix`: the conversion matrix (MxN)
+        `indices`: indices of the old edges, coinciding with the new edges (M+1 elements),
+            the new bin `i` contains the old bins `indices[i]:indices[i+1]`
+    """
 
     __slots__ = (
         "_edges_old",
         "_edges_old_clones",
         "_edges_new",
         "_result",
+        "_indices",
         "_atol",
         "_rtol",
         "_mode",
@@ -44,6 +49,7 @@ class RebinMatrix(Node):
     _edges_old_clones: tuple[Input, ...]
     _edges_new: Input
     _result: Output
+    _indices: Output
     _atol: float
     _rtol: float
     _mode: str
@@ -75,6 +81,7 @@ class RebinMatrix(Node):
         self._edges_old = self._add_input("edges_old")  # input: 0
         self._edges_new = self._add_input("edges_new", positional=False)  # input: 1
         self._result = self._add_output("matrix")  # output: 0
+        self._indices = self._add_output("indices", positional=False)
         self._functions_dict.update(
             {
                 "python": self._function_python,
@@ -96,28 +103,36 @@ class RebinMatrix(Node):
 
     def _function_python(self):
         edges_old = self._edges_old.data
+        atol, rtol = self._atol, self._rtol
         ret = _calc_rebin_matrix_python(
-            edges_old, self._edges_new.data, self._result._data, self.atol, self.rtol
+            edges_old,
+            self._edges_new.data,
+            self._result._data,
+            self._indices._data,
+            atol,
+            rtol,
         )
         if ret[0] > 0:
             self.__raise_exception_at_wrong_edges(*ret)
         for i, input in enumerate(self._edges_old_clones):
-            if not allclose(edges_old, input.data, atol=self._atol, rtol=self._rtol):
+            if not allclose(edges_old, input.data, atol=atol, rtol=rtol):
                 raise RuntimeError(f"Clones of old edges are inconsistent (input {i})")
 
     def _function_numba(self):
         edges_old = self._edges_old.data
+        atol, rtol = self._atol, self._rtol
         ret = _calc_rebin_matrix_numba(
-            self._edges_old.data,
+            edges_old,
             self._edges_new.data,
             self._result._data,
-            self.atol,
-            self.rtol,
+            self._indices._data,
+            atol,
+            rtol,
         )
         if ret[0] > 0:
             self.__raise_exception_at_wrong_edges(*ret)
         for i, input in enumerate(self._edges_old_clones):
-            if not allclose(edges_old, input.data, atol=self._atol, rtol=self._rtol):
+            if not allclose(edges_old, input.data, atol=atol, rtol=rtol):
                 raise RuntimeError(f"Clones of old edges are inconsistent (input {i})")
 
     def __raise_exception_at_wrong_edges(self, retcode, iold, edge_old, inew, edge_new) -> None:
@@ -142,52 +157,9 @@ class RebinMatrix(Node):
             self._edges_old.dd.size - 1,
         )
         self._result.dd.dtype = "d"
+        self._indices.dd.shape = (self._edges_new.dd.size,)
+        self._indices.dd.dtype = "l"
         self.function = self._functions_dict[self.mode]
         assign_edges_from_inputs_to_outputs((self._edges_new, self._edges_old), self._result)
 
         self._edges_old_clones = tuple(self.inputs[1:])
-
-
-def _calc_rebin_matrix_python(
-    edges_old: NDArray,
-    edges_new: NDArray,
-    rebin_matrix: NDArray,
-    atol: float,
-    rtol: float,
-) -> tuple[int, int, float, int, float]:
-    """
-    For a column C of size N: Cnew = M C
-    Cnew = [Mx1]
-    M = [MxN]
-    C = [Nx1]
-    """
-
-    if edges_new[0] < edges_old[0] and not isclose(edges_new[0], edges_old[0], atol=atol, rtol=rtol):
-        return 1, 0, edges_old[0], 0, edges_new[0]
-    if edges_new[-1] > edges_old[-1] and not isclose(edges_new[-1], edges_old[-1], atol=atol, rtol=rtol):
-        return 2, -1, edges_old[-1], -1, edges_new[-1]
-
-    inew = 0
-    iold = 0
-    edge_old = edges_old[0]
-    edge_new_prev = edges_new[0]
-    # nold = edges_old.size
-
-    stepper_old = enumerate(edges_old)
-    iold, edge_old = next(stepper_old)
-    for inew, edge_new in enumerate(edges_new[1:], 1):
-        while edge_old < edge_new and not isclose(edge_new, edge_old, atol=atol, rtol=rtol):
-            if edge_old >= edge_new_prev or isclose(edge_old, edge_new_prev, atol=atol, rtol=rtol):
-                rebin_matrix[inew - 1, iold] = 1.0
-
-            iold, edge_old = next(stepper_old)
-
-        if not isclose(edge_new, edge_old, atol=atol, rtol=rtol):
-            return 3, iold, edge_old, inew, edge_new_prev
-
-    return 0, iold, edge_old, inew, edge_new_prev
-
-
-_calc_rebin_matrix_numba: Callable[
-    [NDArray, NDArray, NDArray, float, float], tuple[int, int, float, int, float]
-] = njit(cache=True)(_calc_rebin_matrix_python)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from dagflow.core.exception import TypeFunctionError
+from dagflow.core.input_strategy import AddNewInputAddNewOutput
+from dagflow.core.node import Node
+from dagflow.core.type_functions import (
+    AllPositionals,
+    check_dimension_of_inputs,
+    check_size_of_inputs,
+)
+
+from dgf_detector._kernels.rebin import _rebin_sum
+
+if TYPE_CHECKING:
+    from dagflow.core.input import Input
+
+
+class RebinSum(Node):
+    """Rebin a histogram by summing its bins, a sparse alternative to the product with the
+    RebinMatrix.
+
+    inputs:
+        `indices`: indices of the old edges, coinciding with the new edges (M+1 elements),
+            the `indices` output of RebinMatrix
+        `matrix`: the `matrix` output of RebinMatrix (MxN), only its shape and edges are used
+            to check the inputs, the data is not read
+        `i`: a histogram to rebin (N elements)
+
+    outputs:
+        `i`: the rebinned histogram (M elements)
+    """
+
+    __slots__ = ("_indices", "_matrix")
+
+    _indices: Input
+    _matrix: Input
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(
+            *args,
+            **kwargs,
+            input_strategy=AddNewInputAddNewOutput(input_fmt="vector", output_fmt="result"),
+        )
+        self.labels.setdefaults(
+            {
+                "text": "Rebinned histogram",
+            }
+        )
+        self._indices = self._add_input("indices", positional=False)
+        self._matrix = self._add_input("matrix", positional=False)
+
+    def _function(self):
+        indices = self._indices.data
+        for i, (input, output) in enumerate(zip(self.inputs, self.outputs)):
+            vector = input.data
+            if indices[-1] > vector.size:
+                raise RuntimeError(
+                    f"Input {i} has {vector.size} bins, but the indices require at least {indices[-1]}"
+                )
+            if not _rebin_sum(indices, vector, output._data):
+                raise RuntimeError(f"The indices are not monotonous: {indices}")
+
+    def _type_function(self) -> None:
+        """A output takes this function to determine the dtype and shape"""
+        check_dimension_of_inputs(self, ("indices",), 1)
+        check_dimension_of_inputs(self, ("matrix",), 2)
+        check_dimension_of_inputs(self, AllPositionals, 1)
+        check_size_of_inputs(self, "indices", min=2)
+        nbins_new, nbins_old = self._matrix.dd.shape
+        if self._indices.dd.size != nbins_new + 1:
+            raise TypeFunctionError(
+                f"Indices size {self._indices.dd.size} is inconsistent with the matrix {self._matrix.dd.shape}",
+                node=self,
+                input=self._indices,
+            )
+        edges = self._matrix.dd.axes_edges
+        for input, output in zip(self.inputs, self.outputs):
+            if input.dd.size != nbins_old:
+                raise TypeFunctionError(
+                    f"Input size {input.dd.size} is inconsistent with the matrix {self._matrix.dd.shape}",
+                    node=self,
+                    input=input,
+                )
+            output.dd.shape = (nbins_new,)
+            output.dd.dtype = input.dd.dtype
+            if edges:
+                output.dd.axes_edges = (edges[0],)
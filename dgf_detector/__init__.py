@@ -6,3 +6,4 @@ from .EnergyResolutionSigmaRelABC import EnergyResolutionSigmaRelABC
 from .Monotonize import Monotonize
 from .Rebin import Rebin
 from .RebinMatrix import RebinMatrix
+from .RebinSum import RebinSum
@@ -0,0 +1,6 @@
+"""Numba kernels of the nodes.
+
+The kernels are kept apart from the nodes: numba caches the compiled functions per source file,
+thus the changes of a node module do not invalidate the cache. The kernels touch no python
+objects and release the GIL.
+"""
@@ -0,0 +1,172 @@
+"""Kernels of the AxisDistortionMatrix."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from numba import njit
+from numpy import allclose
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from numpy.typing import NDArray
+
+
+def _axisdistortion_python(
+    edges_original: NDArray,
+    edges_target: NDArray,
+    edges_modified: NDArray,
+    edges_backwards: NDArray,
+    rows: NDArray,
+    columns: NDArray,
+    values: NDArray,
+) -> int:
+    """Compute the nonzero elements of the distortion matrix.
+
+    The elements are written as (row, column, value) triplets to the `rows`, `columns` and
+    `values` arrays, the number of elements written is returned.
+    """
+    # in general, target edges may be different (finer than original), the code should be able to handle it.
+    # but currently we just check that edges are the same.
+    assert edges_original is edges_target or allclose(edges_original, edges_target, atol=0.0, rtol=0.0)
+
+    edges_target = edges_original
+    min_original = edges_original[0]
+    min_target = edges_target[0]
+    nbinsx = edges_original.size - 1
+    nbinsy = edges_target.size - 1
+
+    nnz = 0
+
+    threshold = -1e10
+    # left_axis = 0
+    right_axis = 0
+    idxx0, idxx1, idxy = -1, -1, 0
+    leftx_fine, lefty_fine = threshold, threshold
+    # step at least into the first original bin: on a tie of the first original and backward
+    # edges the latter is taken first, which would leave `idxx0 == -1`
+    while (
+        idxx0 < 0
+        or leftx_fine <= threshold
+        or leftx_fine < min_original
+        or lefty_fine < min_target
+    ):
+        left_edge_from_x = edges_original[idxx0 + 1] < edges_backwards[idxx1 + 1]
+        if left_edge_from_x:
+            leftx_fine, lefty_fine = (
+                edges_original[idxx0 + 1],
+                edges_modified[idxx0 + 1],
+            )
+            # left_axis = 0
+            if (idxx0 := idxx0 + 1) >= nbinsx:
+                return nnz
+        else:
+            leftx_fine, lefty_fine = edges_backwards[idxx1 + 1], edges_target[idxx1 + 1]
+            # left_axis = 1
+            if (idxx1 := idxx1 + 1) >= nbinsx:
+                return nnz
+
+    # the right edges are reloaded only when the corresponding index is advanced
+    right_orig = edges_original[idxx0 + 1]
+    right_backwards = edges_backwards[idxx1 + 1]
+    width_coarse = right_orig - edges_original[idxx0]
+    while True:
+        if right_orig < right_backwards:
+            rightx_fine = right_orig
+            righty_fine = edges_modified[idxx0 + 1]
+            right_axis = 0
+        else:
+            rightx_fine = right_backwards
+            righty_fine = edges_target[idxx1 + 1]
+            right_axis = 1
+
+        while idxy < nbinsy and lefty_fine >= edges_target[idxy + 1]:
+            idxy += 1
+        if idxy >= nbinsy:
+            # the left edge reached the end of the target axis before the walk is finished, which
+            # happens when a modified edge matches the last target edge: the rest is out of range
+            break
+
+        ##
+        ## Uncomment the following lines to see the debug output
+        ## (you need to also uncomment all the `left_axis` lines)
+        ##
+        # width_fine = rightx_fine-leftx_fine
+        # factor = width_fine/width_coarse
+        # print(
+        #         f"x:{leftx_fine:8.4f}→{rightx_fine:8.4f}="
+        #         f"{width_fine:8.4f}/{width_coarse:8.4f}={factor:8.4g} "
+        #         f"ax:{left_axis}→{right_axis} idxx:{idxx0: 4d},{idxx1: 4d} idxy: {idxy: 4d} "
+        #         f"y:{lefty_fine:8.4f}→{righty_fine:8.4f}"
+        # )
+
+        # the pieces of zero width (ties of the edges) do not produce the elements
+        if rightx_fine > leftx_fine:
+            rows[nnz] = idxy
+            columns[nnz] = idxx0
+            values[nnz] = (rightx_fine - leftx_fine) / width_coarse
+            nnz += 1
+
+        if right_axis == 0:
+            if (idxx0 := idxx0 + 1) >= nbinsx:
+                break
+            width_coarse = edges_original[idxx0 + 1] - right_orig
+            right_orig = edges_original[idxx0 + 1]
+        else:
+            if (idxx1 := idxx1 + 1) >= nbinsx:
+                break
+            right_backwards = edges_backwards[idxx1 + 1]
+        leftx_fine, lefty_fine = rightx_fine, righty_fine
+        # left_axis = right_axis
+
+    return nnz
+
+
+def _clear_matrix_python(
+    matrix: NDArray,
+    rows: NDArray,
+    columns: NDArray,
+    nnz: int,
+) -> None:
+    """Set to zero the elements written by the previous call.
+
+    Only first `nnz` elements, listed in `rows` and `columns` are cleared. The negative `nnz`
+    means that the matrix content is unknown and the whole matrix is cleared.
+    """
+    if nnz < 0:
+        matrix.fill(0.0)
+        return
+    for i in range(nnz):
+        matrix[rows[i], columns[i]] = 0.0
+
+
+def _fill_matrix_python(
+    matrix: NDArray,
+    rows: NDArray,
+    columns: NDArray,
+    values: NDArray,
+    nnz: int,
+) -> None:
+    """Fill the dense matrix from the first `nnz` (row, column, value) triplets.
+
+    The other elements of the matrix are expected to be zero.
+    """
+    for i in range(nnz):
+        matrix[rows[i], columns[i]] = values[i]
+
+
+_axisdistortion_numba: Callable[
+    [NDArray, NDArray, NDArray, NDArray, NDArray, NDArray, NDArray], int
+] = njit(
+    cache=True,
+    nogil=True,
+    boundscheck=False,
+    error_model="numpy",
+)(_axisdistortion_python)
+_clear_matrix_numba: Callable[[NDArray, NDArray, NDArray, int], None] = njit(
+    cache=True, nogil=True
+)(_clear_matrix_python)
+_fill_matrix_numba: Callable[[NDArray, NDArray, NDArray, NDArray, int], None] = njit(
+    cache=True, nogil=True
+)(_fill_matrix_python)
@@ -0,0 +1,104 @@
+"""Kernels of the AxisDistortionMatrixLinear."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from numba import njit
+from numpy import allclose
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from numpy.typing import NDArray
+
+
+def _axisdistortion_linear_python(
+    edges_original: NDArray,
+    edges_target: NDArray,
+    edges_modified: NDArray,
+    matrix: NDArray,
+):
+    # in general, target edges may be different (finer than original), the code should be able to handle it.
+    # but currently we just check that edges are the same.
+    assert edges_original is edges_target or allclose(edges_original, edges_target, atol=0.0, rtol=0.0)
+    min_target = edges_target[0]
+    nbinsx = edges_original.size - 1
+    nbinsy = edges_target.size - 1
+
+    matrix.fill(0.0)
+
+    threshold = -1e10
+    # left_axis = 0
+    right_axis = 0
+    idxy0, idxy1, idxy = -1, -1, 0
+    # leftx_fine = threshold
+    lefty_fine = threshold
+    while idxy0 < 0 or lefty_fine <= threshold or lefty_fine < min_target:
+        left_edge_from_x = edges_modified[idxy0 + 1] < edges_target[idxy1 + 1]
+        if left_edge_from_x:
+            # leftx_fine = edges_original[idxy0 + 1]
+            lefty_fine = edges_modified[idxy0 + 1]
+            # left_axis = 0
+            if (idxy0 := idxy0 + 1) >= nbinsx:
+                return
+        else:
+            # leftx_fine = -1
+            lefty_fine = edges_target[idxy1 + 1]
+            # left_axis = 1
+            if (idxy1 := idxy1 + 1) >= nbinsy:
+                return
+
+    width_coarse = edges_modified[idxy0 + 1] - edges_modified[idxy0]
+    while True:
+        right_modified = edges_modified[idxy0 + 1]
+        right_target = edges_target[idxy1 + 1]
+
+        if right_modified < right_target:
+            righty_fine = right_modified
+            # rightx_fine = edges_original[idxy0 + 1]
+            right_axis = 0
+        else:
+            righty_fine = right_target
+            # rightx_fine = -1
+            right_axis = 1
+
+        while idxy < nbinsy and lefty_fine >= edges_target[idxy + 1]:
+            idxy += 1
+        if idxy >= nbinsy:
+            # the left edge reached the end of the target axis before the walk is finished, which
+            # happens when a modified edge matches the last target edge: the rest is out of range
+            break
+
+        #
+        # Uncomment the following lines to see the debug output
+        # (you need to also uncomment all the `left_axis` lines)
+        #
+        # width_fine = righty_fine-lefty_fine
+        # factor = width_fine/width_coarse
+        # print(
+        #         f"x:{leftx_fine:8.4f}→{rightx_fine:8.4f} "
+        #         f"ax:{left_axis}→{right_axis} idxy:{idxy0: 4d},{idxy1: 4d} idxy: {idxy: 4d} "
+        #         f"y:{lefty_fine:8.4f}→{righty_fine:8.4f}/{edges_modified[idxy0]:8.4f}→{edges_modified[idxy0+1]:8.4f}="
+        #         f"{width_fine:8.4f}/{width_coarse:8.4f}={factor:8.4g} "
+        # )
+
+        matrix[idxy, idxy0] = (righty_fine - lefty_fine) / width_coarse
+
+        if right_axis == 0:
+            if (idxy0 := idxy0 + 1) >= nbinsx:
+                break
+            width_coarse = edges_modified[idxy0 + 1] - edges_modified[idxy0]
+        elif (idxy1 := idxy1 + 1) >= nbinsx:
+            break
+        lefty_fine = righty_fine
+        # leftx_fine = rightx_fine
+        # left_axis = right_axis
+
+
+_axisdistortion_linear_numba: Callable[[NDArray, NDArray, NDArray, NDArray], None] = njit(
+    cache=True,
+    nogil=True,
+    boundscheck=False,
+    error_model="numpy",
+)(_axisdistortion_linear_python)
@@ -0,0 +1,126 @@
+"""Kernels of the RebinMatrix."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from numba import njit
+from numpy import searchsorted
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from numpy.typing import NDArray
+
+
+def _calc_rebin_matrix_python(
+    edges_old: NDArray,
+    edges_new: NDArray,
+    rebin_matrix: NDArray,
+    indices: NDArray,
+    atol: float,
+    rtol: float,
+) -> tuple[int, int, float, int, float]:
+    """
+    For a column C of size N: Cnew = M C
+    Cnew = [Mx1]
+    M = [MxN]
+    C = [Nx1]
+
+    Edges `a` and `b` are considered equal if `abs(a-b) <= atol + rtol*abs(b)`, similar to
+    `numpy.isclose`. The check is written inline as `numpy.isclose` is slow for scalars.
+
+    The `rebin_matrix` is the persistent output buffer: it is cleared on each call.
+    """
+    rebin_matrix.fill(0.0)
+
+    if edges_new[0] < edges_old[0] and abs(edges_new[0] - edges_old[0]) > atol + rtol * abs(edges_old[0]):
+        return 1, 0, edges_old[0], 0, edges_new[0]
+    if edges_new[-1] > edges_old[-1] and abs(edges_new[-1] - edges_old[-1]) > atol + rtol * abs(edges_old[-1]):
+        return 2, -1, edges_old[-1], -1, edges_new[-1]
+
+    # fast path: each new edge coincides with one of the old edges, find the closest old edge
+    # for each new one and fill the matrix rows by the column ranges
+    nold = edges_old.size
+    nnew = edges_new.size
+    consistent = False
+    if nnew > 1 and (nold - 1) % (nnew - 1) == 0:
+        # the new edges may be each `stride`-th old edge: no need to search
+        stride = (nold - 1) // (nnew - 1)
+        consistent = True
+        for inew in range(nnew):
+            iold = inew * stride
+            if abs(edges_new[inew] - edges_old[iold]) > atol + rtol * abs(edges_old[iold]):
+                consistent = False
+                break
+            indices[inew] = iold
+    if not consistent:
+        indices[:] = searchsorted(edges_old, edges_new)
+        consistent = True
+        for inew in range(nnew):
+            iold = indices[inew]
+            edge_new = edges_new[inew]
+            if iold == nold or (iold > 0 and edge_new - edges_old[iold - 1] < edges_old[iold] - edge_new):
+                iold -= 1
+            if abs(edge_new - edges_old[iold]) > atol + rtol * abs(edges_old[iold]) or (
+                inew > 0 and iold < indices[inew - 1]
+            ):
+                # not an old edge or the new edges are not monotonous: let the walker report
+                consistent = False
+                break
+            indices[inew] = iold
+    if consistent:
+        for inew in range(1, nnew):
+            rebin_matrix[inew - 1, indices[inew - 1] : indices[inew]] = 1.0
+        return 0, indices[-1], edges_old[indices[-1]], nnew - 1, edges_new[-1]
+
+    # slow path: walk over the edges to find the inconsistent one
+    inew = 0
+    iold = 0
+    edge_old = edges_old[0]
+    edge_new_prev = edges_new[0]
+
+    for inew in range(1, nnew):
+        edge_new = edges_new[inew]
+        while edge_old < edge_new and abs(edge_new - edge_old) > atol + rtol * abs(edge_old):
+            if edge_old >= edge_new_prev or abs(edge_old - edge_new_prev) <= atol + rtol * abs(edge_new_prev):
+                rebin_matrix[inew - 1, iold] = 1.0
+
+            if (iold := iold + 1) >= nold:
+                return 2, iold - 1, edge_old, inew, edge_new
+            edge_old = edges_old[iold]
+
+        if abs(edge_new - edge_old) > atol + rtol * abs(edge_old):
+            return 3, iold, edge_old, inew, edge_new_prev
+
+    return 0, iold, edge_old, inew, edge_new_prev
+
+
+_calc_rebin_matrix_numba: Callable[
+    [NDArray, NDArray, NDArray, NDArray, float, float], tuple[int, int, float, int, float]
+] = njit(
+    cache=True,
+    nogil=True,
+    boundscheck=False,
+    error_model="numpy",
+)(_calc_rebin_matrix_python)
+
+
+@njit(cache=True, nogil=True)
+def _rebin_sum(
+    indices: NDArray,
+    vector: NDArray,
+    result: NDArray,
+) -> bool:
+    """Sum the old bins `indices[i]:indices[i+1]` of the `vector` into the `result[i]`.
+
+    Returns False if the indices are not monotonous.
+    """
+    for inew in range(indices.size - 1):
+        if indices[inew + 1] < indices[inew]:
+            return False
+        res = 0.0
+        for iold in range(indices[inew], indices[inew + 1]):
+            res += vector[iold]
+        result[inew] = res
+    return True
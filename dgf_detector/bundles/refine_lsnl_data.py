@@ -1,6 +1,6 @@
-from numpy import arange, concatenate, linspace
+from numpy import arange, concatenate, empty, eye, linspace
 from numpy.typing import NDArray
-from scipy.interpolate import interp1d
+from scipy.interpolate import make_interp_spline
 
 from multikeydict.nestedmkdict import NestedMKDict
 
@@ -28,6 +28,7 @@ class RefineGraph:
         "xfine_bound",
         "xfine_extended",
         "xfine_extended_stack",
+        "interpolation_matrix",
         "refine_times",
         "newmin",
         "newmax",
@@ -36,6 +37,7 @@ class RefineGraph:
     xfine_bound: NDArray
     xfine_extended: NDArray
     xfine_extended_stack: tuple[NDArray | None, NDArray | None, NDArray | None]
+    interpolation_matrix: NDArray
     refine_times: int
     newmin: float
     newmax: float
@@ -60,9 +62,6 @@ class RefineGraph:
         self.xfine_bound = linspace(self.xcoarse[0], self.xcoarse[-1], shape_fine)
 
     def make_extended_x(self):
-        if self.newmin is None and self.newmax is None:
-            return
-
         xstack = [None, self.xfine_bound, None]
         if self.newmin is not None:
             xstack[0] = arange(
@@ -77,12 +76,19 @@ class RefineGraph:
                 self.xfine_bound[-1], self.newmax + stepright * 1.0e-6, stepright
             )[1:]
 
-        self.xfine_extended = concatenate(xstack)
+        self.xfine_extended = concatenate([x for x in xstack if x is not None])
         self.xfine_extended_stack = tuple(xstack)
 
+    def make_interpolation_matrix(self) -> None:
+        # the cubic spline is linear in y: interpolate each unit vector once, then the
+        # interpolation of any y is a product with the matrix
+        fcn = make_interp_spline(self.xcoarse, eye(self.xcoarse.size), k=3)
+        self.interpolation_matrix = fcn(self.xfine_bound)
+
     def _process_x(self):
         self.make_finer_x()
         self.make_extended_x()
+        self.make_interpolation_matrix()
 
     def process(self, y: NDArray, nominal: NDArray) -> NDArray:
         skip_diff = y is nominal
@@ -96,32 +102,32 @@ class RefineGraph:
         return yrel * self.xcoarse
 
     def _method_interpolate(self, ycoarse) -> NDArray:
-        fcn = interp1d(
-            self.xcoarse,
-            ycoarse,
-            kind="cubic",
-            bounds_error=False,
-            fill_value="extrapolate",
-        )
-        return fcn(self.xfine_bound)
+        # equivalent to interp1d(kind="cubic"), the spline is precomputed
+        return self.interpolation_matrix @ ycoarse
 
     def _method_extrapolate(self, ybound: NDArray) -> NDArray:
-        fcn = interp1d(
-            self.xfine_bound,
-            ybound,
-            kind="linear",
-            bounds_error=False,
-            fill_value="extrapolate",
-        )
+        # linear extrapolation with the first and the last segments, same as
+        # interp1d(kind="linear", fill_value="extrapolate"), but without building an interpolator
+        xbound = self.xfine_bound
 
+        # the output is stitched in a single buffer, it should be a new array for each call
+        # as the results are stored
         xleft, _, xright = self.xfine_extended_stack
-        ystack = [None, ybound, None]
+        ileft = 0 if xleft is None else xleft.size
+        iright = ileft + ybound.size
+        yunbound = empty(self.xfine_extended.size, dtype=ybound.dtype)
+        yunbound[ileft:iright] = ybound
         if xleft is not None:
-            ystack[0] = fcn(xleft)
+            slope = (ybound[1] - ybound[0]) / (xbound[1] - xbound[0])
+            yunbound[:ileft] = slope * (xleft - xbound[0]) + ybound[0]
         if xright is not None:
-            ystack[-1] = fcn(xright)
+            slope = (ybound[-1] - ybound[-2]) / (xbound[-1] - xbound[-2])
+            yunbound[iright:] = slope * (xright - xbound[-2]) + ybound[-2]
 
-        return concatenate(ystack)
+        return yunbound
 
     def _method_diff(self, nominal: NDArray, y: NDArray) -> NDArray:
-        return nominal if nominal is y else y - nominal
+        # `y` is a new array, created by `_method_extrapolate`: subtract in place
+        if nominal is not y:
+            y -= nominal
+        return y
@@ -1,4 +1,4 @@
-from numpy import allclose, array, finfo
+from numpy import allclose, asarray, count_nonzero, finfo
 from pytest import mark
 
 from dagflow.core.graph import Graph
@@ -29,6 +29,8 @@ from dgf_detector.AxisDistortionMatrixLinear import AxisDistortionMatrixLinear
         "test3_minimal5",
         "test3_minimal6",
         "test4_variable",
+        "test5_identity",
+        "test5_scale",
     ),
 )
 @mark.parametrize(
@@ -38,13 +40,12 @@ from dgf_detector.AxisDistortionMatrixLinear import AxisDistortionMatrixLinear
         True,
     ),
 )
-def test_AxisDistortionMatrix(setname: str, dtype: str, linear: bool):
-    test_sets_current = test_sets[f"{'' if linear else 'non'}linear"]
-    edgesset = test_sets_current[setname]
-    edges = array(edgesset["edges"], dtype=dtype)
-    edges_modified = array(edgesset["edges_modified"], dtype=dtype)
-    edges_backward = array(edgesset["edges_backward"], dtype=dtype)
-    desired = array(edgesset["matrix"], dtype=dtype)
+def test_AxisDistortionMatrix(setname: str, dtype: str, linear: bool, save_graphs: bool):
+    edgesset = test_arrays[f"{'' if linear else 'non'}linear"][setname]
+    edges = edgesset["edges"].astype(dtype, copy=False)
+    edges_modified = edgesset["edges_modified"].astype(dtype, copy=False)
+    edges_backward = edgesset["edges_backward"].astype(dtype, copy=False)
+    desired = edgesset["matrix"].astype(dtype, copy=False)
     nbins = len(edges) - 1
 
     print()
@@ -52,7 +53,7 @@ def test_AxisDistortionMatrix(setname: str, dtype: str, linear: bool):
     print("Edges after:\n", edges_modified)
     print("Edges back:\n", edges_backward)
     print("Desired matrix:\n", desired)
-    print("Desired matrix sum:\n", desired.sum(axis=0))
+    print("Desired matrix sum:\n", edgesset["matrix_sum"])
 
     with Graph(close_on_exit=True) as graph:
         Edges = Array("Edges", edges, mode="fill")
@@ -80,19 +81,106 @@ def test_AxisDistortionMatrix(setname: str, dtype: str, linear: bool):
 
     atol = 0 if dtype == "d" else finfo(dtype).resolution * 0.5
     assert allclose(res, desired, atol=atol, rtol=0)
+    if not linear:
+        csr = mat.to_csr()
+        assert csr.nnz == mat.nnz == count_nonzero(res)
+        assert allclose(csr.toarray(), res, atol=0, rtol=0)
 
-    idxstart, idxend = 0, nbins
-    while idxstart < nbins and ressum[idxstart] < 1.0:
-        idxstart += 1
-    while idxend > 0 and ressum[idxend - 1] < 1.0:
-        idxend -= 1
+    # the columns between the first and the last complete ones
+    complete = ressum >= 1.0
+    if complete.any():
+        idxstart, idxend = complete.argmax(), nbins - complete[::-1].argmax()
+    else:
+        idxstart = idxend = nbins
     assert allclose(ressum[idxstart:idxend], 1, rtol=0, atol=0)
+    assert allclose(ressum, edgesset["matrix_sum"], atol=atol, rtol=0)
 
     out_edges = mat.outputs[0].dd.axes_edges
     assert out_edges[0] is out_edges[1]
     assert out_edges[0] is Edges.outputs[0]
 
-    savegraph(graph, f"output/test_AxisDistortionMatrix{linear and 'Linear' or ''}_{dtype}.png")
+    if save_graphs:
+        savegraph(graph, f"output/test_AxisDistortionMatrix{linear and 'Linear' or ''}_{dtype}.dot")
+
+
+@mark.parametrize("dtype", ("d", "f"))
+def test_AxisDistortionMatrix_reevaluation(dtype: str):
+    # sets with the same edges, the first one is repeated in the end
+    setnames = ("test1", "test2_undershoot_left", "test2_undershoot_right", "test1")
+    edgessets = [
+        {key: value.astype(dtype, copy=False) for key, value in edgesset.items()}
+        for edgesset in (test_arrays["nonlinear"][setname] for setname in setnames)
+    ]
+    edges = edgessets[0]["edges"]
+
+    with Graph(close_on_exit=True):
+        Edges = Array("Edges", edges, mode="fill")
+        EdgesModified = Array("Edges modified", edgessets[0]["edges_modified"], mode="fill")
+        EdgesBackward = Array(
+            "Edges, projected backward", edgessets[0]["edges_backward"], mode="fill"
+        )
+        mat = AxisDistortionMatrix("LSNL matrix")
+        Edges >> mat.inputs["EdgesOriginal"]
+        Edges >> mat.inputs["EdgesTarget"]
+        EdgesModified >> mat.inputs["EdgesModified"]
+        EdgesBackward >> mat.inputs["EdgesModifiedBackwards"]
+
+        # a fresh node for each set to compare with
+        mats_fresh = []
+        for i, edgesset in enumerate(edgessets):
+            mat_fresh = AxisDistortionMatrix(f"LSNL matrix {i}")
+            Edges >> mat_fresh.inputs["EdgesOriginal"]
+            Edges >> mat_fresh.inputs["EdgesTarget"]
+            EdgesModified_i = Array(
+                f"Edges modified {i}", edgesset["edges_modified"], mode="fill"
+            )
+            EdgesBackward_i = Array(
+                f"Edges, projected backward {i}", edgesset["edges_backward"], mode="fill"
+            )
+            EdgesModified_i >> mat_fresh.inputs["EdgesModified"]
+            EdgesBackward_i >> mat_fresh.inputs["EdgesModifiedBackwards"]
+            mats_fresh.append(mat_fresh)
+
+    atol = 0 if dtype == "d" else finfo(dtype).resolution * 0.5
+    for i, (edgesset, mat_fresh) in enumerate(zip(edgessets, mats_fresh)):
+        if i > 0:
+            EdgesModified.outputs["array"].set(edgesset["edges_modified"])
+            EdgesBackward.outputs["array"].set(edgesset["edges_backward"])
+        res = mat.get_data()
+        assert (res == mat_fresh.get_data()).all()
+        assert allclose(res, edgesset["matrix"], atol=atol, rtol=0)
+        nbins = edges.size - 1
+        assert mat.nnz <= 2 * nbins
+        # the triplets are replayed by the next clear: they should address the matrix
+        assert (mat._columns[: mat.nnz] >= 0).all()
+        assert (mat._rows[: mat.nnz] < nbins).all()
+
+
+def test_AxisDistortionMatrix_last_target_edge():
+    # the interior modified edge 7.8+0.5 matches the last edge 8.3, while the backward projected
+    # edge 8.3-0.5 is slightly above 7.8 due to rounding (in double precision): the walker
+    # reaches the end of the target axis before the end of the walk
+    edges = asarray([0.2, 0.4, 0.8, 2.2, 2.7, 5.5, 5.8, 6.1, 6.4, 7.7, 7.8, 8.0, 8.3], dtype="d")
+    nbins = edges.size - 1
+
+    with Graph(close_on_exit=True):
+        Edges = Array("Edges", edges, mode="fill")
+        EdgesModified = Array("Edges modified", edges + 0.5, mode="fill")
+        EdgesBackward = Array("Edges, projected backward", edges - 0.5, mode="fill")
+        mat = AxisDistortionMatrix("LSNL matrix")
+        Edges >> mat.inputs["EdgesOriginal"]
+        Edges >> mat.inputs["EdgesTarget"]
+        EdgesModified >> mat.inputs["EdgesModified"]
+        EdgesBackward >> mat.inputs["EdgesModifiedBackwards"]
+
+    res = mat.get_data()
+    assert (mat._rows[: mat.nnz] < nbins).all()
+    assert (mat._columns[: mat.nnz] >= 0).all()
+    assert allclose(mat.to_csr().toarray(), res, atol=0, rtol=0)
+
+    ressum = res.sum(axis=0)
+    assert (ressum >= 0).all()
+    assert (ressum <= 1).all()
 
 
 # fmt: off
@@ -240,6 +328,40 @@ test_sets = {
                     [           (0.0-0.0),           (0.0-0.0),           (0.0-0.0), (11.0-7.0)/(11.5-6.5) ],    # 3
                     ]
                 ),
+            'test5_identity': dict(
+                # from:           0    1    2    3    4    5
+                edges          = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0 ],
+                edges_backward = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0 ],
+                # to              0    1    2    3    4    5
+                # edges        = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0 ]
+                edges_modified = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0 ],
+                # from:           0    1    2    3    4    5
+                matrix =       [                          # To:
+                # From:  0    1    2    3    4    #
+                    [ 1.0, 0.0, 0.0, 0.0, 0.0 ],  # 0
+                    [ 0.0, 1.0, 0.0, 0.0, 0.0 ],  # 1
+                    [ 0.0, 0.0, 1.0, 0.0, 0.0 ],  # 2
+                    [ 0.0, 0.0, 0.0, 1.0, 0.0 ],  # 3
+                    [ 0.0, 0.0, 0.0, 0.0, 1.0 ],  # 4
+                    ]
+                ),
+            'test5_scale': dict(
+                # from:           0         1         2         3         4         5
+                edges          = [0.0,      1.0,      2.0,      3.0,      4.0,      5.0        ],
+                edges_backward = [0.0, 0.8,      1.6,      2.4,      3.2,      4.0             ],
+                # to              0    1         2         3         4    5
+                # edges        = [0.0, 1.0,      2.0,      3.0,      4.0, 5.0                  ]
+                edges_modified = [0.0,      1.25,     2.5,      3.75,     5.0,      6.25       ],
+                # from:           0         1         2         3         4         5
+                matrix =       [                                                                            # To:
+                # From:            0                    1                    2                    3       4    #
+                    [ (1.00-0.00)/1.25,                0.0,                0.0,                0.0,    0.0 ],  # 0
+                    [ (1.25-1.00)/1.25, (2.00-1.25)/1.25,                0.0,                0.0,    0.0 ],  # 1
+                    [              0.0, (2.50-2.00)/1.25, (3.00-2.50)/1.25,                0.0,    0.0 ],  # 2
+                    [              0.0,              0.0, (3.75-3.00)/1.25, (4.00-3.75)/1.25,    0.0 ],  # 3
+                    [              0.0,              0.0,              0.0, (5.00-4.00)/1.25,    0.0 ],  # 4
+                    ]
+                ),
         },
         "nonlinear": {
             'test1': dict(
@@ -384,5 +506,52 @@ test_sets = {
                     [           0.0,           0.0,           0.0, (8.6-7.2)/4.0 ],    # 3
                     ]
                 ),
+            'test5_identity': dict(
+                # from:           0    1    2    3    4    5
+                edges          = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0 ],
+                edges_backward = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0 ],
+                # to              0    1    2    3    4    5
+                # edges        = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0 ]
+                edges_modified = [0.0, 1.0, 2.0, 3.0, 4.0, 5.0 ],
+                # from:           0    1    2    3    4    5
+                matrix =       [                          # To:
+                # From:  0    1    2    3    4    #
+                    [ 1.0, 0.0, 0.0, 0.0, 0.0 ],  # 0
+                    [ 0.0, 1.0, 0.0, 0.0, 0.0 ],  # 1
+                    [ 0.0, 0.0, 1.0, 0.0, 0.0 ],  # 2
+                    [ 0.0, 0.0, 0.0, 1.0, 0.0 ],  # 3
+                    [ 0.0, 0.0, 0.0, 0.0, 1.0 ],  # 4
+                    ]
+                ),
+            'test5_scale': dict(
+                # from:           0         1         2         3         4         5
+                edges          = [0.0,      1.0,      2.0,      3.0,      4.0,      5.0        ],
+                edges_backward = [0.0, 0.8,      1.6,      2.4,      3.2,      4.0             ],
+                # to              0    1         2         3         4    5
+                # edges        = [0.0, 1.0,      2.0,      3.0,      4.0, 5.0                  ]
+                edges_modified = [0.0,      1.25,     2.5,      3.75,     5.0,      6.25       ],
+                # from:           0         1         2         3         4         5
+                matrix =       [                                                       # To:
+                # From:           0              1              2              3       4    #
+                    [ (0.8-0.0)/1.0,           0.0,           0.0,           0.0,    0.0 ],  # 0
+                    [ (1.0-0.8)/1.0, (1.6-1.0)/1.0,           0.0,           0.0,    0.0 ],  # 1
+                    [           0.0, (2.0-1.6)/1.0, (2.4-2.0)/1.0,           0.0,    0.0 ],  # 2
+                    [           0.0,           0.0, (3.0-2.4)/1.0, (3.2-3.0)/1.0,    0.0 ],  # 3
+                    [           0.0,           0.0,           0.0, (4.0-3.2)/1.0,    0.0 ],  # 4
+                    ]
+                ),
         }
     }
+# fmt: on
+
+# the test sets converted to arrays once, on import, along with the column sums of the matrices
+test_arrays = {
+    kind: {
+        setname: {key: asarray(value, dtype="d") for key, value in edgesset.items()}
+        for setname, edgesset in sets.items()
+    }
+    for kind, sets in test_sets.items()
+}
+for sets in test_arrays.values():
+    for edgesset in sets.values():
+        edgesset["matrix_sum"] = edgesset["matrix"].sum(axis=0)
@@ -22,7 +22,9 @@ parnames = ("a_nonuniform", "b_stat", "c_noise")
         [[6.025, 7.025, 8.025, 8.825]],
     ],
 )
-def test_EnergyResolutionMatrixBC_v01(input_binning, debug_graph, Energy_set, testname):
+def test_EnergyResolutionMatrixBC_v01(
+    input_binning, debug_graph, save_graphs, Energy_set, testname
+):
     def singularities(values, Edges):
         indices = digitize(values, Edges) - 1
         phist = zeros(Edges.size - 1)
@@ -56,7 +58,8 @@ def test_EnergyResolutionMatrixBC_v01(input_binning, debug_graph, Energy_set, te
             edges >> eres.inputs["Edges"]
             edges >> eres.inputs["EdgesOut"]
             ereses.append(eres)
-    savegraph(graph, f"output/{testname}.png")
+    if save_graphs:
+        savegraph(graph, f"output/{testname}.dot")
 
     for i, eres in enumerate(ereses):
         centers_in = eres.outputs["Energy"].data
@@ -10,7 +10,7 @@ from dagflow.plot.plot import plot_auto
 from dgf_detector.EnergyResolutionSigmaRelABC import EnergyResolutionSigmaRelABC
 
 
-def test_EnergyResolutionSigmaRelABC_v01(debug_graph, testname):
+def test_EnergyResolutionSigmaRelABC_v01(debug_graph, save_graphs, testname):
     weights = [0.016, 0.081, 0.026]
     Energy = linspace(1.0, 8.0, 200)
     parnames = ("a_nonuniform", "b_stat", "c_noise")
@@ -36,4 +36,5 @@ def test_EnergyResolutionSigmaRelABC_v01(debug_graph, testname):
     ) ** 0.5
     assert allclose(res, cmpto, rtol=0, atol=finfo("d").resolution)
 
-    savegraph(graph, f"output/{testname}.png")
+    if save_graphs:
+        savegraph(graph, f"output/{testname}.dot")
@@ -20,6 +20,7 @@ def test_monotonize(
     gradient,
     start,
     debug_graph,
+    save_graphs,
     testname,
 ):
     x = linspace(0.0, 10, 101)[1:]
@@ -76,4 +77,5 @@ def test_monotonize(
     fig.savefig(f"output/{testname}-plot.png")
     plt.close()
 
-    savegraph(graph, f"output/{testname}.png")
+    if save_graphs:
+        savegraph(graph, f"output/{testname}.dot")
@@ -1,24 +1,19 @@
-from matplotlib import pyplot as plt
-from numpy import allclose, finfo, linspace, matmul
+from numpy import add, allclose, arange, eye, finfo, linspace, matmul
 from numpy.typing import NDArray
 from pytest import mark, raises
 
 from dagflow.core.graph import Graph
 from dagflow.lib.common import Array
+from dagflow.lib.linalg import VectorMatrixProduct
 from dagflow.plot.graphviz import savegraph
-from dagflow.plot.plot import closefig, plot_array_1d_hist, savefig
 
 from dgf_detector.Rebin import Rebin
 from dgf_detector.RebinMatrix import RebinMatrix
+from dgf_detector.RebinSum import RebinSum
 
 
-def partial_sum(y_old: NDArray, stride: int) -> list:
-    psum = []
-    i = 0
-    while i < y_old.size:
-        psum.append(y_old[i : i + stride].sum())
-        i += stride
-    return psum
+def partial_sum(y_old: NDArray, stride: int) -> NDArray:
+    return add.reduceat(y_old, arange(0, y_old.size, stride))
 
 
 @mark.parametrize("dtype", ("d", "f"))
@@ -26,7 +21,18 @@ def partial_sum(y_old: NDArray, stride: int) -> list:
 @mark.parametrize("stride", (2, 4))
 @mark.parametrize("mode", ("python", "numba"))
 @mark.parametrize("nclones", (0, 2))
-def test_Rebin(testname: str, start: int, stride: int, dtype: str, mode: str, nclones: int):
+@mark.parametrize("sparse", (False, True))
+def test_Rebin(
+    testname: str,
+    start: int,
+    stride: int,
+    dtype: str,
+    mode: str,
+    nclones: int,
+    sparse: bool,
+    save_graphs: bool,
+    plots: bool,
+):
     n = 21
     edges_old = linspace(0.0, 2.0, n, dtype=dtype)
     edges_new = edges_old[start::stride]
@@ -38,7 +44,7 @@ def test_Rebin(testname: str, start: int, stride: int, dtype: str, mode: str, nc
         EdgesNew = Array("edges_new", edges_new, mode="fill")
         Y = Array("Y", y_old_list[0], mode="fill")
         Y2 = Array("Y2", y_old_list[1], mode="fill")
-        metanode = Rebin(mode=mode, atol=atol)
+        metanode = Rebin(mode=mode, atol=atol, sparse=sparse)
 
         EdgesOld >> metanode.inputs["edges_old"]
         EdgesNew >> metanode.inputs["edges_new"]
@@ -68,36 +74,74 @@ def test_Rebin(testname: str, start: int, stride: int, dtype: str, mode: str, nc
         y_check = partial_sum(y_old[start:], stride)
         assert allclose(y_check[: len(y_new)], y_new, atol=atol, rtol=0)
 
-    # plots
-    plot_array_1d_hist(
-        array=y_old_list[0], edges=edges_old, color="blue", label="old edges 1", linewidth=2
-    )
-    plot_array_1d_hist(
-        array=y_old_list[1], edges=edges_old, color="orange", label="old edges 2", linewidth=2
-    )
-    plot_array_1d_hist(
-        array=metanode.outputs[0].data,
-        edges=edges_new,
-        color="blue",
-        linestyle="-.",
-        label="new edges 1",
-        linewidth=2,
-    )
-    plot_array_1d_hist(
-        array=metanode.outputs[1].data,
-        edges=edges_new,
-        color="orange",
-        linestyle="-.",
-        label="new edges 2",
-        linewidth=2,
-    )
-    plt.xlabel("x")
-    plt.ylabel("y")
-    plt.legend(fontsize="x-large")
-    savefig(f"output/{testname}-plot.png")
-    closefig()
-
-    savegraph(graph, f"output/{testname}-graph.png")
+    if plots:
+        # imported only when plotting: the import of pyplot is slow
+        from matplotlib import pyplot as plt
+
+        from dagflow.plot.plot import closefig, plot_array_1d_hist, savefig
+
+        plot_array_1d_hist(
+            array=y_old_list[0], edges=edges_old, color="blue", label="old edges 1", linewidth=2
+        )
+        plot_array_1d_hist(
+            array=y_old_list[1], edges=edges_old, color="orange", label="old edges 2", linewidth=2
+        )
+        plot_array_1d_hist(
+            array=metanode.outputs[0].data,
+            edges=edges_new,
+            color="blue",
+            linestyle="-.",
+            label="new edges 1",
+            linewidth=2,
+        )
+        plot_array_1d_hist(
+            array=metanode.outputs[1].data,
+            edges=edges_new,
+            color="orange",
+            linestyle="-.",
+            label="new edges 2",
+            linewidth=2,
+        )
+        plt.xlabel("x")
+        plt.ylabel("y")
+        plt.legend(fontsize="x-large")
+        savefig(f"output/{testname}-plot.png")
+        closefig()
+
+    if save_graphs:
+        savegraph(graph, f"output/{testname}-graph.dot")
+
+
+@mark.parametrize("mode", ("python", "numba"))
+@mark.parametrize("sparse", (False, True))
+def test_Rebin_replicate(mode: str, sparse: bool):
+    start, stride = 1, 4
+    edges_old = linspace(0.0, 2.0, 21)
+    edges_new = edges_old[start::stride]
+    y_old_dict = {"a": linspace(3.0, 0.0, 20), "b": linspace(2.0, 0.0, 20)}
+    name = "rebin_sum" if sparse else "vector_matrix_product"
+
+    atol = finfo("d").resolution * 10
+    with Graph(close_on_exit=True):
+        EdgesOld = Array("edges_old", edges_old, mode="fill")
+        EdgesNew = Array("edges_new", edges_new, mode="fill")
+        _, storage = Rebin.replicate(replicate_outputs=tuple(y_old_dict), sparse=sparse, mode=mode)
+
+        EdgesOld >> storage["inputs.rebin_matrix.edges_old"]
+        EdgesNew >> storage["inputs.rebin_matrix.edges_new"]
+        for key, y_old in y_old_dict.items():
+            Array(f"Y_{key}", y_old, mode="fill") >> storage[f"inputs.{name}.{key}"]
+
+    assert isinstance(storage[f"nodes.{name}.a"], RebinSum if sparse else VectorMatrixProduct)
+    indices = storage["nodes.rebin_matrix"].outputs["indices"].data
+    assert (indices == arange(start, edges_old.size, stride)).all()
+
+    mat = storage["outputs.rebin_matrix"].data
+    for key, y_old in y_old_dict.items():
+        y_new = storage[f"outputs.{name}.{key}"].data
+        assert allclose(matmul(mat, y_old), y_new, atol=atol, rtol=0)
+        y_check = partial_sum(y_old[start:], stride)
+        assert allclose(y_check[: len(y_new)], y_new, atol=atol, rtol=0)
 
 
 @mark.parametrize(
@@ -107,6 +151,8 @@ def test_Rebin(testname: str, start: int, stride: int, dtype: str, mode: str, nc
         linspace(0.0, 2.1, 21),
         linspace(0.0, 2.0, 41),
         linspace(0.0, 2.0, 10),
+        linspace(0.0, 2.0, 21)[[0, 4, 2, 6]],
+        linspace(0.0, 2.0, 21)[::-2],
     ),
 )
 @mark.parametrize("mode", ("python", "numba"))
@@ -123,7 +169,7 @@ def test_RebinMatrix_wrong_edges_new(edges_new, mode):
 
 
 @mark.parametrize("mode", ("python", "numba"))
-def test_RebinMatrix_wrong_edges_new(mode):
+def test_RebinMatrix_inconsistent_clones(mode):
     edges_old = linspace(0.0, 2.0, 21)
     edges_new = edges_old[0::2]
     edges_clone = edges_old.copy()
@@ -140,3 +186,20 @@ def test_RebinMatrix_wrong_edges_new(mode):
     # mat.print()
     with raises(RuntimeError):
         mat.get_data()
+
+
+@mark.parametrize("mode", ("python", "numba"))
+def test_RebinMatrix_reevaluation(mode):
+    edges_old = linspace(0.0, 2.0, 21)
+    with Graph(close_on_exit=True):
+        EdgesOld = Array("edges_old", edges_old, mode="fill")
+        EdgesNew = Array("edges_new", edges_old[:11], mode="fill")
+        mat = RebinMatrix("Rebin Matrix", mode=mode)
+        EdgesOld >> mat("edges_old")
+        EdgesNew >> mat("edges_new")
+
+    assert (mat.get_data() == eye(10, 20)).all()
+
+    # the same number of the new edges: the matrix buffer is reused
+    EdgesNew.outputs["array"].set(edges_old[10:])
+    assert (mat.get_data() == eye(10, 20, 10)).all()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+"""Check the refinement of the LSNL curves against the interp1d based reference"""
+from numpy import allclose, array_equal, concatenate, linspace, sin
+from numpy.typing import NDArray
+from pytest import mark
+from scipy.interpolate import interp1d
+
+from dgf_detector.bundles.refine_lsnl_data import RefineGraph
+
+
+def refine_reference(graph: RefineGraph, y: NDArray) -> NDArray:
+    """Cubic interpolation and linear extrapolation, done with interp1d"""
+    xbound = graph.xfine_bound
+    ybound = interp1d(graph.xcoarse, y * graph.xcoarse, kind="cubic")(xbound)
+    fcn = interp1d(xbound, ybound, kind="linear", fill_value="extrapolate")
+
+    xleft, _, xright = graph.xfine_extended_stack
+    ystack = [ybound]
+    if xleft is not None:
+        ystack.insert(0, fcn(xleft))
+    if xright is not None:
+        ystack.append(fcn(xright))
+
+    return concatenate(ystack)
+
+
+@mark.parametrize("refine_times", [1, 4])
+@mark.parametrize("newmin,newmax", [(0.0, None), (None, 15.0), (0.0, 15.0)])
+def test_RefineGraph(refine_times, newmin, newmax):
+    xcoarse = linspace(1.0, 12.0, 23)
+    nominal = 1.0 + 0.1 * sin(xcoarse)
+    ys = [nominal + 0.01 * sin(3.0 * xcoarse), nominal - 0.02 * xcoarse / xcoarse[-1]]
+
+    graph = RefineGraph(xcoarse, refine_times=refine_times, newmin=newmin, newmax=newmax)
+
+    xfine = graph.xfine_extended
+    assert xfine.size == sum(x.size for x in graph.xfine_extended_stack if x is not None)
+    assert array_equal(xfine[(xfine >= xcoarse[0]) & (xfine <= xcoarse[-1])], graph.xfine_bound)
+    assert (xfine[0] < xcoarse[0]) == (newmin is not None)
+    assert (xfine[-1] > xcoarse[-1]) == (newmax is not None)
+
+    nominal_fine = graph.process(nominal, nominal)
+    nominal_fine_copy = nominal_fine.copy()
+    nominal_ref = refine_reference(graph, nominal)
+    assert nominal_fine.shape == xfine.shape
+    assert allclose(nominal_fine, nominal_ref, rtol=1e-12, atol=0)
+
+    for y in ys:
+        res = graph.process(y, nominal_fine)
+        res_ref = refine_reference(graph, y) - nominal_ref
+        assert res is not nominal_fine
+        assert allclose(res, res_ref, rtol=0, atol=1e-12 * abs(nominal_ref).max())
+
+    # the differences are computed in place and should not touch the stored nominal
+    assert array_equal(nominal_fine, nominal_fine_copy)